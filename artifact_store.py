@@ -0,0 +1,66 @@
+import os
+
+
+class ArtifactStore:
+    """On-disk layout for annotated session photos and their thumbnails.
+
+    Files live under ``root`` in ``<shard>/<session_id>/`` directories, where
+    the shard is the low byte of the session id in hex, so no directory grows
+    past a few hundred entries however many sessions are recorded. Paths
+    handed out and accepted are relative to ``root``; the database keeps
+    those, not absolute paths.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def session_dir(self, session_id):
+        return os.path.join(f"{int(session_id) & 0xff:02x}", str(int(session_id)))
+
+    def paths(self, session_id, index):
+        """Relative ``(photo, thumbnail)`` paths for one photo of a session."""
+        base = os.path.join(self.session_dir(session_id), str(int(index)))
+        return f"{base}.jpg", f"{base}_thumb.jpg"
+
+    def abspath(self, rel_path):
+        root = os.path.abspath(self.root)
+        path = os.path.abspath(os.path.join(root, rel_path))
+        if os.path.commonpath([path, root]) != root:
+            raise ValueError(f"Artifact path escapes the store: {rel_path}")
+        return path
+
+    def remove(self, rel_paths):
+        """Delete files, then any session directories left empty; returns the
+        number of bytes freed."""
+        freed = 0
+        dirs = set()
+        for rel in rel_paths:
+            if not rel:
+                continue
+            path = self.abspath(rel)
+            try:
+                freed += os.path.getsize(path)
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            dirs.add(os.path.dirname(path))
+        for d in dirs:
+            try:
+                os.rmdir(d)
+            except OSError:
+                pass
+        return freed
+
+    def walk(self, older_than=None):
+        """Relative paths of every stored file, or only of those last
+        modified before the ``older_than`` timestamp."""
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                if older_than is not None:
+                    try:
+                        if os.path.getmtime(path) >= older_than:
+                            continue
+                    except OSError:
+                        continue  # removed while walking
+                yield os.path.relpath(path, self.root)
@@ -0,0 +1,102 @@
+"""Latency and recall of adaptive/tiled detection against the fixed setup.
+
+    python benchmarks/bench_detection.py --images path/to/class_photos --min-face-px 48
+
+The reference is what the app did before adaptive mode existed: photos
+narrower than 1000px are upscaled 2x with cubic interpolation and the
+detector runs at 1280x1280. Recall is the share of reference faces that the
+adaptive run also finds (IoU >= --iou in original image coordinates);
+"extra" counts adaptive detections with no reference counterpart, which on
+crowded photos are mostly small faces the fixed setup misses.
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inference_pool import load_face_app
+from recognition import DEFAULT_DETECTION, detect
+
+
+def iou_matrix(a, b):
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def run_fixed(det_model, img):
+    start = time.perf_counter()
+    h, w = img.shape[:2]
+    scale = 2 if w < 1000 else 1
+    if scale != 1:
+        img = cv2.resize(img, (w * 2, h * 2), interpolation=cv2.INTER_CUBIC)
+    bboxes, _ = detect(det_model, img, {"mode": "fixed"})
+    return time.perf_counter() - start, bboxes[:, :4] / scale
+
+
+def run_adaptive(det_model, img, cfg):
+    start = time.perf_counter()
+    bboxes, _ = detect(det_model, img, cfg)
+    return time.perf_counter() - start, bboxes[:, :4]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', required=True, help="directory of class photos")
+    parser.add_argument('--min-face-px', type=int, default=DEFAULT_DETECTION["min_face_px"])
+    parser.add_argument('--target-face-px', type=int, default=DEFAULT_DETECTION["target_face_px"])
+    parser.add_argument('--min-size', type=int, default=DEFAULT_DETECTION["min_size"])
+    parser.add_argument('--max-size', type=int, default=DEFAULT_DETECTION["max_size"])
+    parser.add_argument('--iou', type=float, default=0.5)
+    args = parser.parse_args()
+
+    cfg = dict(
+        DEFAULT_DETECTION, mode="adaptive",
+        min_face_px=args.min_face_px,
+        target_face_px=args.target_face_px,
+        min_size=args.min_size,
+        max_size=args.max_size
+    )
+    det_model = load_face_app((1280, 1280)).det_model
+
+    fixed_t, adaptive_t = [], []
+    ref_total = matched = extra = 0
+    for name in sorted(os.listdir(args.images)):
+        img = cv2.imread(os.path.join(args.images, name), cv2.IMREAD_COLOR)
+        if img is None:
+            continue
+        t_fixed, ref = run_fixed(det_model, img)
+        t_adaptive, found = run_adaptive(det_model, img, cfg)
+        fixed_t.append(t_fixed)
+        adaptive_t.append(t_adaptive)
+
+        hits = 0
+        if len(ref) and len(found):
+            hits = int((iou_matrix(ref, found).max(axis=1) >= args.iou).sum())
+            extra += int((iou_matrix(found, ref).max(axis=1) < args.iou).sum())
+        else:
+            extra += len(found)
+        ref_total += len(ref)
+        matched += hits
+        print(f"{name:<40} fixed {t_fixed * 1000:7.1f}ms {len(ref):4d} faces | "
+              f"adaptive {t_adaptive * 1000:7.1f}ms {len(found):4d} faces")
+
+    if not fixed_t:
+        sys.exit(f"No readable images in {args.images}")
+    print()
+    print(f"median latency  fixed {np.median(fixed_t) * 1000:.1f}ms  adaptive {np.median(adaptive_t) * 1000:.1f}ms")
+    print(f"recall vs fixed {matched / ref_total if ref_total else 1.0:.3f}  ({matched}/{ref_total}), extra faces {extra}")
+
+
+if __name__ == '__main__':
+    main()
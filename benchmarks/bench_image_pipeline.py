@@ -0,0 +1,90 @@
+"""Wall time of the upload image path, sequential versus the threaded pipeline.
+
+    python benchmarks/bench_image_pipeline.py --images path/to/class_photos --infer-ms 400
+    python benchmarks/bench_image_pipeline.py --synthetic 12 --infer-ms 400
+
+The model is replaced by a sleep of --infer-ms per photo (measure the real
+figure with bench_inference_pool.py) so the numbers isolate decode, resize
+and JPEG encode and how much of them the pipeline hides behind inference.
+--synthetic writes N random 4000x3000 JPEGs, the size of a phone photo.
+"""
+import argparse
+import itertools
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from image_pipeline import ImagePipeline
+
+MARKS = [((100 + 150 * i, 200, 220 + 150 * i, 340), f"Student {i}", (0, 255, 0)) for i in range(20)]
+
+
+def sequential(paths, out_dir, infer_s, quality, max_side):
+    writer = ImagePipeline(workers=1, jpeg_quality=quality, max_side=max_side)
+    for index, path in enumerate(paths):
+        img = cv2.imread(path, cv2.IMREAD_COLOR)
+        time.sleep(infer_s)
+        writer._write(os.path.join(out_dir, f"seq_{index}.jpg"), img, MARKS)
+
+
+def pipelined(paths, out_dir, infer_s, quality, max_side, workers, chunk):
+    pipeline = ImagePipeline(workers=workers, jpeg_quality=quality, max_side=max_side)
+    photos = pipeline.decode_files(paths, prefetch=2 * chunk)
+    saves = []
+    while True:
+        batch = list(itertools.islice(photos, chunk))
+        if not batch:
+            break
+        time.sleep(infer_s * len(batch))
+        for index, img in batch:
+            saves.append(pipeline.save_annotated(os.path.join(out_dir, f"pipe_{index}.jpg"), img, MARKS))
+    for future in saves:
+        future.result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', help="directory of class photos")
+    parser.add_argument('--synthetic', type=int, default=12)
+    parser.add_argument('--infer-ms', type=float, default=400)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--chunk', type=int, default=4)
+    parser.add_argument('--quality', type=int, nargs='+', default=[95, 90, 80])
+    parser.add_argument('--max-side', type=int, default=2560)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.images:
+            paths = [os.path.join(args.images, n) for n in sorted(os.listdir(args.images))]
+        else:
+            rng = np.random.default_rng(0)
+            base = cv2.GaussianBlur(rng.integers(0, 256, (3000, 4000, 3), dtype=np.uint8), (0, 0), 3)
+            paths = []
+            for i in range(args.synthetic):
+                paths.append(os.path.join(tmp, f"photo_{i}.jpg"))
+                cv2.imwrite(paths[-1], np.roll(base, 37 * i, axis=1))
+        out_dir = os.path.join(tmp, "out")
+        os.makedirs(out_dir)
+        infer_s = args.infer_ms / 1000
+
+        print(f"{len(paths)} photos, simulated inference {args.infer_ms:.0f}ms/photo, max side {args.max_side}")
+        print(f"{'quality':>7} {'sequential':>11} {'pipelined':>10} {'avg artifact':>13}")
+        for quality in args.quality:
+            start = time.perf_counter()
+            sequential(paths, out_dir, infer_s, quality, args.max_side)
+            seq = time.perf_counter() - start
+            start = time.perf_counter()
+            pipelined(paths, out_dir, infer_s, quality, args.max_side, args.workers, args.chunk)
+            pipe = time.perf_counter() - start
+            sizes = [os.path.getsize(os.path.join(out_dir, n)) for n in os.listdir(out_dir) if n.startswith("pipe_")]
+            print(f"{quality:>7} {seq:>10.2f}s {pipe:>9.2f}s {np.mean(sizes) / 1024:>11.0f}KB")
+
+
+if __name__ == '__main__':
+    main()
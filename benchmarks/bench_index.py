@@ -0,0 +1,84 @@
+"""Top-k recall and query speed of the IVF index against the exact scan.
+
+    python benchmarks/bench_index.py --students 50000 --nlist 256 --nprobe 4 8 16 32
+    python benchmarks/bench_index.py --from-index instance/embedding_index.npz
+
+Without --from-index a synthetic gallery is generated: identities drawn
+around a few hundred cluster centres, which is harsher on IVF than uniform
+noise. Queries are gallery vectors with added noise, mimicking a fresh
+photo of an enrolled student. Recall@k is the overlap between the IVF and
+exact top-k lists.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embedding_index import build_index, load_index
+
+
+def synthetic_gallery(n, dim, clusters, seed):
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dim))
+    vectors = centres[rng.integers(0, clusters, n)] + rng.normal(size=(n, dim)) * 0.8
+    return [f"S{i:06d}" for i in range(n)], vectors.astype(np.float32)
+
+
+def timed_search(index, queries, k):
+    start = time.perf_counter()
+    ids, _ = index.search(queries, k)
+    return ids, len(queries) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--from-index', help="saved index to take the gallery vectors from")
+    parser.add_argument('--students', type=int, default=50000)
+    parser.add_argument('--dim', type=int, default=512)
+    parser.add_argument('--clusters', type=int, default=500)
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--noise', type=float, default=0.5)
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--nlist', type=int, default=256)
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[4, 8, 16, 32])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.from_index:
+        source = load_index(args.from_index)
+        ids, vectors = list(source.ids), source.vectors
+    else:
+        ids, vectors = synthetic_gallery(args.students, args.dim, args.clusters, args.seed)
+    dim = vectors.shape[1]
+
+    rng = np.random.default_rng(args.seed + 1)
+    picks = rng.integers(0, len(ids), args.queries)
+    queries = vectors[picks] + rng.normal(size=(args.queries, dim)).astype(np.float32) * args.noise * np.linalg.norm(vectors[picks], axis=1, keepdims=True) / np.sqrt(dim)
+
+    exact = build_index('exact', dim=dim)
+    exact.add(ids, vectors)
+    truth, exact_qps = timed_search(exact, queries, args.k)
+    print(f"{len(ids)} students, {args.queries} queries, k={args.k}")
+    print(f"{'mode':<16} {'queries/s':>10} {'recall@1':>9} {'recall@k':>9}")
+    print(f"{'exact':<16} {exact_qps:>10.0f} {1.0:>9.3f} {1.0:>9.3f}")
+
+    ivf = build_index('ivf', dim=dim, nlist=args.nlist)
+    start = time.perf_counter()
+    ivf.add(ids, vectors)
+    if ivf.centroids is None:
+        ivf.train()
+    print(f"(ivf build + train {time.perf_counter() - start:.1f}s)")
+    for nprobe in args.nprobe:
+        ivf.nprobe = nprobe
+        found, qps = timed_search(ivf, queries, args.k)
+        r1 = float(np.mean(found[:, 0] == truth[:, 0]))
+        rk = float(np.mean([len(set(a) & set(b)) / args.k for a, b in zip(found, truth)]))
+        print(f"{'ivf nprobe=' + str(nprobe):<16} {qps:>10.0f} {r1:>9.3f} {rk:>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
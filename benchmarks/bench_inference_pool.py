@@ -0,0 +1,73 @@
+"""Throughput of the inference worker pool by worker count.
+
+    python benchmarks/bench_inference_pool.py --images path/to/class_photos --workers 1 2 4 8 --threads 4
+
+Every image in the directory is decoded once, then pushed through the pool
+``--repeat`` times for each worker count. ``--workers 0`` measures the
+in-process model the web app uses when INFERENCE_WORKERS is 0.
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inference_pool import InferencePool, load_face_app
+
+
+def load_images(folder):
+    imgs = []
+    for name in sorted(os.listdir(folder)):
+        img = cv2.imread(os.path.join(folder, name), cv2.IMREAD_COLOR)
+        if img is not None:
+            imgs.append(img)
+    return imgs
+
+
+def run(imgs, workers, threads, det_size, repeat):
+    if workers == 0:
+        face_app = load_face_app(det_size, threads)
+        infer = lambda batch: [face_app.get(img) for img in batch]
+        close = lambda: None
+    else:
+        pool = InferencePool(workers, det_size=det_size, intra_op_threads=threads)
+        infer, close = pool.map, pool.close
+    try:
+        infer(imgs[:max(workers, 1)])  # warm-up: every worker loads its model
+        faces = 0
+        start = time.perf_counter()
+        for _ in range(repeat):
+            faces += sum(len(f) for f in infer(imgs))
+        elapsed = time.perf_counter() - start
+    finally:
+        close()
+    return len(imgs) * repeat / elapsed, faces / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', required=True, help="directory of class photos")
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 1, 2, 4])
+    parser.add_argument('--threads', type=int, default=None, help="intra-op threads per worker")
+    parser.add_argument('--det-size', type=int, default=1280)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    imgs = load_images(args.images)
+    if not imgs:
+        sys.exit(f"No readable images in {args.images}")
+
+    print(f"{len(imgs)} images, det_size={args.det_size}, threads/worker={args.threads or 'default'}")
+    print(f"{'workers':>8} {'images/s':>10} {'faces/s':>10} {'speedup':>8}")
+    baseline = None
+    for workers in args.workers:
+        ips, fps = run(imgs, workers, args.threads, (args.det_size, args.det_size), args.repeat)
+        baseline = baseline or ips
+        print(f"{workers:>8} {ips:>10.2f} {fps:>10.1f} {ips / baseline:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+"""Offline throughput and accuracy of the whole attendance pipeline.
+
+    python benchmarks/bench_pipeline.py --photos fixtures/class_photos \\
+        --gallery fixtures/students --labels fixtures/labels.csv \\
+        --synthetic 500 --threshold 0.3 0.4 0.5 --detection fixed adaptive
+
+Runs the real app on CPU against a throwaway SQLite database, driving it
+through the Flask test client so every photo takes exactly the
+/register-student and /process-classphoto code paths, background job
+included.
+
+--gallery is a directory with one sub-directory of enrollment photos per
+student, named by enrollment number. --synthetic adds N more students with
+random templates to the same cohort as distractors. --labels lists who is
+really in each class photo, as CSV rows of ``photo,enrollment_no`` or a
+JSON object ``{photo: [enrollment_no, ...]}``; with it the Present marks
+are scored (precision, recall) against the fixture students.
+
+Every threshold x detection combination replays all photos. Latency is per
+upload, from the POST to the job reporting done. Results are cached only
+with --keep-cache: then later combinations reuse the detections, which is
+fine for threshold sweeps but makes their timings meaningless.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+IMAGE_EXTS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+
+
+def load_labels(path):
+    labels = {}
+    if path.endswith('.json'):
+        with open(path) as fh:
+            for photo, enrolls in json.load(fh).items():
+                labels[photo] = set(map(str, enrolls))
+    else:
+        with open(path, newline='') as fh:
+            for row in csv.reader(fh):
+                if len(row) >= 2 and row[0] != 'photo':
+                    labels.setdefault(row[0].strip(), set()).add(row[1].strip())
+    return labels
+
+
+def list_images(directory):
+    return sorted(n for n in os.listdir(directory) if n.lower().endswith(IMAGE_EXTS))
+
+
+def histogram_sum(histogram):
+    return sum(v for name, _, v in histogram.samples() if name.endswith('_sum'))
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Harness:
+    def __init__(self, appmod, workdir):
+        self.A = appmod
+        self.client = appmod.app.test_client()
+        self.workdir = workdir
+        self.uploads = 0
+
+    def setup(self):
+        A = self.A
+        with A.app.app_context():
+            A.db.drop_all()
+            A.db.create_all()
+        self.client.post('/register-faculty', data={
+            'full_name': 'Bench', 'email': 'bench@localhost', 'subject': 'Bench', 'year': '1', 'semester': '1'})
+        r = self.client.post('/login-process?role=faculty', data={'identifier': 'bench@localhost', 'secret': '123'})
+        if r.status_code != 200:
+            sys.exit(f"Faculty login failed: {r.data!r}")
+
+    def register(self, gallery_dir):
+        enrolled, failed = [], []
+        start = time.perf_counter()
+        for enroll in sorted(os.listdir(gallery_dir)):
+            folder = os.path.join(gallery_dir, enroll)
+            if not os.path.isdir(folder):
+                continue
+            photos = []
+            for name in list_images(folder):
+                with open(os.path.join(folder, name), 'rb') as fh:
+                    photos.append((io.BytesIO(fh.read()), name))
+            r = self.client.post('/register-student', data={
+                'full_name': enroll, 'enroll': enroll, 'gender': '-', 'year': '1', 'semester': '1',
+                'password': 'x', 'photos': photos}, content_type='multipart/form-data')
+            (enrolled if r.status_code == 200 else failed).append(enroll)
+        return enrolled, failed, time.perf_counter() - start
+
+    def add_synthetic(self, n, dim=512, seed=0):
+        A = self.A
+        vectors = np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+        with A.app.app_context():
+            for start in range(0, n, 1000):
+                A.bulk_insert(A.Student, [{
+                    "full_name": f"Synthetic {i}", "enrollment_no": f"SYN{i:06d}", "gender": "-",
+                    "year": "1", "semester": "1", "password": "x",
+                    "face_embedding": A.encode_embeddings(vectors[i], A.app.config['EMBEDDING_FORMAT'])
+                } for i in range(start, min(n, start + 1000))])
+            A.db.session.commit()
+
+    def upload(self, photo_paths):
+        files = []
+        for path in photo_paths:
+            with open(path, 'rb') as fh:
+                files.append((io.BytesIO(fh.read()), os.path.basename(path)))
+        self.uploads += 1
+        start = time.perf_counter()
+        r = self.client.post('/process-classphoto', data={
+            'subject': 'Bench', 'date': f"bench-{self.uploads}", 'year': '1', 'semester': '1',
+            'class_photos': files}, content_type='multipart/form-data')
+        if r.status_code != 202:
+            raise RuntimeError(f"Upload rejected: {r.data!r}")
+        status_url = r.get_json()['status_url']
+        while True:
+            status = self.client.get(status_url).get_json()
+            if status['status'] in ('done', 'failed'):
+                break
+            time.sleep(0.005)
+        elapsed = time.perf_counter() - start
+        if status['status'] == 'failed':
+            raise RuntimeError(f"Attendance job failed: {status['error']}")
+        return status['result']['session_id'], elapsed
+
+    def present(self, session_id):
+        A = self.A
+        with A.app.app_context():
+            return {e for (e,) in A.db.session.query(A.AttendanceRecord.enrollment_no).filter_by(
+                session_id=session_id, status='Present')}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--photos', required=True, help="directory of class photos to replay")
+    parser.add_argument('--gallery', help="directory of <enrollment_no>/ folders of enrollment photos")
+    parser.add_argument('--labels', help="ground truth CSV (photo,enrollment_no) or JSON")
+    parser.add_argument('--synthetic', type=int, default=0, help="random distractor students to add")
+    parser.add_argument('--threshold', type=float, nargs='+', help="MATCH_THRESHOLD values to sweep")
+    parser.add_argument('--detection', nargs='+', default=['fixed'], choices=['fixed', 'adaptive'])
+    parser.add_argument('--photos-per-upload', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=1, help="replay the photo set this many times")
+    parser.add_argument('--keep-cache', action='store_true', help="reuse detections across combinations")
+    parser.add_argument('--workdir', help="keep the database and artifacts here instead of a temp dir")
+    args = parser.parse_args()
+
+    tmp = None
+    workdir = args.workdir
+    if not workdir:
+        tmp = tempfile.TemporaryDirectory()
+        workdir = tmp.name
+    os.makedirs(workdir, exist_ok=True)
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(os.path.abspath(workdir), 'bench.db')}"
+    os.chdir(ROOT)
+
+    import app as A
+    from detection_cache import DetectionCache
+    from recognition import DEFAULT_DETECTION
+    import metrics
+
+    A.app.config.update(
+        MODEL_WARMUP=False, PROFILE_REQUESTS=False, PROFILE_JOBS=False,
+        INDEX_PATH=os.path.join(workdir, 'embedding_index.npz'),
+    )
+    A.artifact_store.root = os.path.join(workdir, 'artifacts')
+    A.detection_cache = None
+
+    harness = Harness(A, workdir)
+    harness.setup()
+    enrolled = []
+    if args.gallery:
+        enrolled, failed, reg_time = harness.register(args.gallery)
+        print(f"registered {len(enrolled)} students in {reg_time:.1f}s"
+              + (f", {len(failed)} rejected: {' '.join(failed[:10])}" if failed else ""))
+    if args.synthetic:
+        harness.add_synthetic(args.synthetic)
+        print(f"added {args.synthetic} synthetic students")
+
+    labels = load_labels(args.labels) if args.labels else None
+    photos = list_images(args.photos) * args.repeat
+    groups = [photos[i:i + args.photos_per_upload] for i in range(0, len(photos), args.photos_per_upload)]
+    thresholds = args.threshold or [A.app.config['MATCH_THRESHOLD']]
+
+    print(f"{len(photos)} photos in {len(groups)} uploads per run\n")
+    header = (f"{'detection':<9} {'thresh':>6} {'img/s':>6} {'faces/s':>8} {'p50':>8} {'p95':>8} "
+              f"{'peak RSS':>9}" + (f" {'precision':>9} {'recall':>7}" if labels else ""))
+    print(header)
+    for mode in args.detection:
+        detection = dict(DEFAULT_DETECTION, mode=mode)
+        A.app.config['DETECTION'] = detection
+        A.detection_cache = DetectionCache(
+            os.path.join(workdir, 'detection_cache'),
+            namespace=json.dumps([A.MODEL_NAME, list(A.app.config['DET_SIZE']), detection], sort_keys=True)
+        ) if args.keep_cache else None
+        for threshold in thresholds:
+            A.app.config['MATCH_THRESHOLD'] = threshold
+            A.gallery_cache.invalidate()
+            faces_before = histogram_sum(metrics.FACES_PER_IMAGE)
+            latencies, tp, fp, fn = [], 0, 0, 0
+            start = time.perf_counter()
+            for group in groups:
+                session_id, elapsed = harness.upload([os.path.join(args.photos, n) for n in group])
+                latencies.append(elapsed)
+                if labels is not None:
+                    truth = set().union(*(labels.get(n, set()) for n in group)) & set(enrolled)
+                    marked = harness.present(session_id) & set(enrolled)
+                    tp += len(marked & truth)
+                    fp += len(marked - truth)
+                    fn += len(truth - marked)
+            wall = time.perf_counter() - start
+            faces = histogram_sum(metrics.FACES_PER_IMAGE) - faces_before
+            p50, p95 = np.percentile(latencies, [50, 95]) * 1000
+            line = (f"{mode:<9} {threshold:>6.2f} {len(photos) / wall:>6.2f} {faces / wall:>8.1f} "
+                    f"{p50:>6.0f}ms {p95:>6.0f}ms {peak_rss_mb():>7.0f}MB")
+            if labels is not None:
+                precision = tp / (tp + fp) if tp + fp else 1.0
+                recall = tp / (tp + fn) if tp + fn else 1.0
+                line += f" {precision:>9.3f} {recall:>7.3f}"
+            print(line)
+
+    if tmp:
+        tmp.cleanup()
+
+
+if __name__ == '__main__':
+    main()
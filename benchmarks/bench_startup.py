@@ -0,0 +1,69 @@
+"""Start-up time and memory of the app: import, first request, first inference.
+
+    python benchmarks/bench_startup.py --runs 5
+    python benchmarks/bench_startup.py --runs 3 --inference
+
+Every run is a fresh interpreter, so nothing is shared between runs.
+Peak RSS is the process high-water mark after each phase. "first request"
+renders the login page, which never touches the model; with --inference a
+blank photo is then pushed through detect_faces (detection cache off),
+which is where the model is now loaded. Importing the app does not need
+the database.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = r"""
+import json, resource, sys, time
+def rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+out = {}
+start = time.perf_counter()
+import app as appmod
+out["import"] = (time.perf_counter() - start, rss_mb())
+appmod.app.config["MODEL_WARMUP"] = False
+client = appmod.app.test_client()
+start = time.perf_counter()
+client.get("/login")
+out["first request"] = (time.perf_counter() - start, rss_mb())
+if "--inference" in sys.argv:
+    import numpy as np
+    appmod.detection_cache = None
+    start = time.perf_counter()
+    appmod.detect_faces([np.zeros((720, 1280, 3), dtype=np.uint8)])
+    out["first inference"] = (time.perf_counter() - start, rss_mb())
+print(json.dumps(out))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--inference', action='store_true', help="also time the first detect_faces call")
+    args = parser.parse_args()
+
+    phases = {}
+    for _ in range(args.runs):
+        cmd = [sys.executable, '-c', PROBE] + (['--inference'] if args.inference else [])
+        result = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+        if result.returncode:
+            sys.exit(result.stderr)
+        for phase, (seconds, rss) in json.loads(result.stdout.strip().splitlines()[-1]).items():
+            phases.setdefault(phase, []).append((seconds, rss))
+
+    print(f"{args.runs} fresh interpreters")
+    print(f"{'phase':<16} {'median':>9} {'min':>9} {'peak RSS':>10}")
+    for phase, samples in phases.items():
+        times = [t for t, _ in samples]
+        print(f"{phase:<16} {statistics.median(times) * 1000:>7.0f}ms {min(times) * 1000:>7.0f}ms "
+              f"{max(r for _, r in samples):>8.0f}MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+import base64
+import csv
+import json
+import multiprocessing as mp
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from embedding_codec import decode_embeddings, encode_embeddings
+from face_templates import build_templates, face_quality
+from matcher import l2_normalize
+
+IMAGE_EXTS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+ROSTER_FIELDS = ('enrollment_no', 'full_name', 'gender', 'year', 'semester', 'password')
+
+
+def read_roster(path):
+    """Students listed in a CSV with a header naming ``ROSTER_FIELDS``
+    (``enroll`` is accepted for ``enrollment_no``, as on the registration
+    form). Returns ``(students, problems)``; problems are
+    ``(enrollment_no or line, reason)`` for rows that cannot be imported."""
+    students, problems, seen = [], [], set()
+    with open(path, newline='', encoding='utf-8-sig') as fh:
+        for line, row in enumerate(csv.DictReader(fh), start=2):
+            row = {k.strip().lower(): (v or '').strip() for k, v in row.items() if k}
+            if not row.get('enrollment_no'):
+                row['enrollment_no'] = row.get('enroll', '')
+            student = {f: row.get(f, '') for f in ROSTER_FIELDS}
+            enroll = student['enrollment_no']
+            missing = [f for f in ROSTER_FIELDS if not student[f]]
+            if missing:
+                problems.append((enroll or f"line {line}", f"missing {', '.join(missing)}"))
+            elif enroll in seen:
+                problems.append((enroll, "listed more than once"))
+            else:
+                seen.add(enroll)
+                students.append(student)
+    return students, problems
+
+
+class PhotoSource:
+    """Enrollment photos from a directory or zip holding one folder per
+    enrollment number (``<enrollment_no>/<any name>.jpg``). Inside a zip the
+    folders may sit under a common top-level directory."""
+
+    def __init__(self, path):
+        self.path = path
+        self._zip = zipfile.ZipFile(path) if zipfile.is_zipfile(path) else None
+        self._members = {}
+        if self._zip is not None:
+            for name in self._zip.namelist():
+                parts = name.strip('/').split('/')
+                if len(parts) >= 2 and parts[-1].lower().endswith(IMAGE_EXTS):
+                    self._members.setdefault(parts[-2], []).append(name)
+
+    def photos(self, enroll):
+        """Encoded photo bytes for one student, in name order."""
+        if self._zip is not None:
+            return [self._zip.read(name) for name in sorted(self._members.get(enroll, []))]
+        folder = os.path.join(self.path, enroll)
+        if not os.path.isdir(folder):
+            return []
+        blobs = []
+        for name in sorted(os.listdir(folder)):
+            if name.lower().endswith(IMAGE_EXTS):
+                with open(os.path.join(folder, name), 'rb') as fh:
+                    blobs.append(fh.read())
+        return blobs
+
+
+# Per-process state of the extraction workers
+_worker = None
+
+
+def _init_worker(source_path, det_size, intra_op_threads, settings):
+    global _worker
+    from inference_pool import load_face_app
+    _worker = (PhotoSource(source_path), load_face_app(det_size, intra_op_threads), settings)
+
+
+def extract_templates(enroll):
+    """Worker task: ``(enroll, templates, reason)``, with the template stack
+    built exactly as registration builds it, or None and why not."""
+    import cv2
+    from recognition import detect_and_embed
+    source, face_app, settings = _worker
+    try:
+        imgs = [cv2.imdecode(np.frombuffer(blob, np.uint8), cv2.IMREAD_COLOR) for blob in source.photos(enroll)]
+        imgs = [img for img in imgs if img is not None]
+        if not imgs:
+            return enroll, None, "no readable photos"
+        embeddings, weights = [], []
+        for faces in detect_and_embed(face_app, imgs, detection=settings['detection']):
+            qualities = [face_quality(f, settings['min_det_score'], settings['min_face_px']) for f in faces]
+            if qualities and max(qualities) > 0:
+                best = int(np.argmax(qualities))
+                embeddings.append(faces[best].embedding)
+                weights.append(qualities[best])
+        if len(embeddings) < settings['min_photos']:
+            return enroll, None, (f"{len(embeddings)} clear face photos of {len(imgs)}, "
+                                  f"at least {settings['min_photos']} required")
+        return enroll, build_templates(embeddings, weights, settings['max_templates']), None
+    except Exception as e:
+        return enroll, None, f"extraction failed: {e}"
+
+
+def extract_all(source_path, enrolls, checkpoint, workers, det_size, intra_op_threads, settings, progress=None):
+    """Run ``extract_templates`` for every enrollment number without
+    templates in ``checkpoint`` across ``workers`` spawned processes, each
+    with its own model, recording results as they arrive. Students that
+    failed before are tried again, so a re-run picks up fixed photos.
+    Interrupting leaves every finished student in the checkpoint."""
+    todo = [e for e in enrolls if checkpoint.done.get(e, (None, None))[0] is None]
+    if not todo:
+        return
+    pool = ProcessPoolExecutor(
+        workers, mp_context=mp.get_context('spawn'),
+        initializer=_init_worker, initargs=(source_path, det_size, intra_op_threads, settings)
+    )
+    try:
+        futures = [pool.submit(extract_templates, enroll) for enroll in todo]
+        for n, future in enumerate(as_completed(futures), start=1):
+            checkpoint.record(*future.result())
+            if progress is not None:
+                progress(n, len(todo))
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+class Checkpoint:
+    """Append-only JSON lines of extraction results, so an interrupted
+    import resumes without running the model again on finished students.
+    ``done`` maps enrollment number to ``(templates or None, reason)``
+    from its latest line."""
+
+    def __init__(self, path):
+        self.path = path
+        self.done = {}
+        if os.path.exists(path):
+            with open(path, 'rb') as fh:
+                data = fh.read()
+            for line in data.decode('utf-8').splitlines():
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # a line torn by a crash; that student is redone
+                blob = entry.get('templates')
+                templates = decode_embeddings(base64.b64decode(blob)) if blob else None
+                self.done[entry['enrollment_no']] = (templates, entry.get('reason'))
+            torn = bool(data) and not data.endswith(b'\n')
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            torn = False
+        self._fh = open(path, 'a', encoding='utf-8')
+        if torn:
+            self._fh.write('\n')
+
+    def record(self, enroll, templates, reason=None):
+        entry = {"enrollment_no": enroll, "reason": reason}
+        if templates is not None:
+            entry["templates"] = base64.b64encode(encode_embeddings(templates, 'f32')).decode('ascii')
+        self._fh.write(json.dumps(entry) + '\n')
+        self._fh.flush()
+        self.done[enroll] = (templates, reason)
+
+    def close(self):
+        self._fh.close()
+
+
+def find_duplicates(embeddings, threshold, block=2048):
+    """Pairs ``(i, j, score)`` with ``i < j`` of rows at least ``threshold``
+    cosine-similar. Each block of rows is scored against the rows after it
+    in one matmul, so memory stays at ``block`` x n."""
+    embeddings = l2_normalize(np.atleast_2d(embeddings))
+    pairs = []
+    for start in range(0, len(embeddings), block):
+        sim = embeddings[start:start + block] @ embeddings[start:].T
+        rows, cols = np.nonzero(np.triu(sim, k=1) >= threshold)
+        pairs += zip((rows + start).tolist(), (cols + start).tolist(), sim[rows, cols].tolist())
+    return pairs
@@ -0,0 +1,145 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+FIELDS = ("bbox", "kps", "det_score", "embedding")
+
+
+class DetectionCache:
+    """Content-addressed on-disk cache of detection + recognition results.
+
+    Entries are keyed by a hash of the decoded image pixels and ``namespace``
+    (model and detector settings), so re-uploading a photo skips inference
+    while any settings change misses cleanly. Each entry is a small ``.npz``
+    of per-face bboxes, landmarks, scores and embeddings under
+    ``root/<2 hex chars>/``. The least recently used entries are deleted once
+    the directory exceeds ``max_bytes``; recency survives restarts through
+    file mtimes, which a background thread reads on first use so creating
+    the cache costs nothing at import. Several processes may share a root:
+    each keeps its own view, and an entry deleted by another process is
+    simply a miss.
+    """
+
+    def __init__(self, root, namespace, max_bytes=512 * 1024 * 1024):
+        self.root = root
+        self.namespace = namespace.encode('utf-8')
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._scan_started = False
+
+    def key(self, img):
+        h = hashlib.blake2b(self.namespace, digest_size=20)
+        h.update(f"{img.shape}|{img.dtype}".encode('ascii'))
+        h.update(np.ascontiguousarray(img).data)
+        return h.hexdigest()
+
+    def get(self, key, image_bytes=0):
+        """Cached list of face dicts for ``key``, or None."""
+        self._start_scan()
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                arrays = {f: data[f] for f in FIELDS if f in data.files}
+            os.utime(path)
+        except (FileNotFoundError, ValueError, OSError):
+            with self._lock:
+                self.misses += 1
+                self._forget(key)
+            return None
+        with self._lock:
+            self.hits += 1
+            self.bytes_saved += image_bytes
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        count = len(arrays["bbox"])
+        return [{f: arrays[f][i] for f in arrays} for i in range(count)]
+
+    def put(self, key, faces):
+        self._start_scan()
+        arrays = {
+            "bbox": np.array([f.bbox for f in faces], dtype=np.float32).reshape(-1, 4),
+            "det_score": np.array([f.det_score for f in faces], dtype=np.float32),
+            "embedding": np.array([f.embedding for f in faces], dtype=np.float32) if faces else np.zeros((0, 0), np.float32),
+        }
+        if faces and all(f.kps is not None for f in faces):
+            arrays["kps"] = np.array([f.kps for f in faces], dtype=np.float32)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp.npz"
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+        size = os.path.getsize(path)
+        with self._lock:
+            self._forget(key)
+            self._entries[key] = size
+            self._bytes += size
+            self._evict()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "bytes_saved": self.bytes_saved,
+                "evictions": self.evictions,
+            }
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], f"{key}.npz")
+
+    def _forget(self, key):
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._bytes -= size
+
+    def _evict(self):
+        while self._entries and self._bytes > self.max_bytes:
+            key, size = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def _start_scan(self):
+        with self._lock:
+            if self._scan_started:
+                return
+            self._scan_started = True
+        threading.Thread(target=self._scan, name='detection-cache-scan', daemon=True).start()
+
+    def _scan(self):
+        if not os.path.isdir(self.root):
+            return
+        found = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.endswith('.npz') and '.tmp' not in name:
+                    try:
+                        st = os.stat(os.path.join(dirpath, name))
+                    except FileNotFoundError:
+                        continue  # evicted by another process meanwhile
+                    found.append((st.st_mtime, name[:-4], st.st_size))
+        with self._lock:
+            # Entries put since start-up are the newest; older files go in
+            # front of them, least recently used first
+            for _, key, size in sorted(found, reverse=True):
+                if key not in self._entries:
+                    self._entries[key] = size
+                    self._entries.move_to_end(key, last=False)
+                    self._bytes += size
+            self._evict()
@@ -0,0 +1,59 @@
+import struct
+
+import numpy as np
+
+# Blob layout: an 8-byte header (format version, dtype code, rows, dim,
+# padding), then for int8 one float32 scale per row, then the row-major
+# values. Version 1 is the only one so far; bump it if the layout changes.
+VERSION = 1
+_HEADER = struct.Struct('<BBHHxx')
+
+FORMATS = {'f32': 1, 'f16': 2, 'i8': 3}
+_DTYPES = {1: np.dtype('<f4'), 2: np.dtype('<f2'), 3: np.dtype('i1')}
+_CODES = {code: name for name, code in FORMATS.items()}
+
+
+def encode_embeddings(vectors, fmt='f32'):
+    """Pack one embedding or a ``(rows, dim)`` stack into a versioned blob.
+
+    ``f32`` is lossless for ArcFace output, ``f16`` halves the size and
+    ``i8`` quarters it with a symmetric per-row scale.
+    """
+    code = FORMATS.get(fmt)
+    if code is None:
+        raise ValueError(f"Unknown embedding format: {fmt}")
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    rows, dim = vectors.shape
+    header = _HEADER.pack(VERSION, code, rows, dim)
+    if fmt == 'i8':
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        values = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return header + scales.astype('<f4').tobytes() + values.tobytes()
+    return header + vectors.astype(_DTYPES[code]).tobytes()
+
+
+def embedding_format(blob):
+    version, code, _, _ = _HEADER.unpack_from(blob)
+    if version != VERSION or code not in _CODES:
+        raise ValueError(f"Unsupported embedding blob (version {version}, format {code})")
+    return _CODES[code]
+
+
+def decode_embeddings(blob):
+    """Unpack a blob into a float32 ``(rows, dim)`` array, or None.
+
+    ``f32`` blobs are returned as a read-only view of the bytes without
+    copying; ``f16`` and ``i8`` are widened to float32.
+    """
+    if blob is None:
+        return None
+    fmt = embedding_format(blob)
+    _, code, rows, dim = _HEADER.unpack_from(blob)
+    offset = _HEADER.size
+    if fmt == 'i8':
+        scales = np.frombuffer(blob, dtype='<f4', count=rows, offset=offset)
+        values = np.frombuffer(blob, dtype=np.int8, count=rows * dim, offset=offset + 4 * rows)
+        return values.reshape(rows, dim) * scales[:, None]
+    values = np.frombuffer(blob, dtype=_DTYPES[code], count=rows * dim, offset=offset).reshape(rows, dim)
+    return values if fmt == 'f32' else values.astype(np.float32)
@@ -0,0 +1,229 @@
+import os
+import threading
+
+import numpy as np
+
+from matcher import l2_normalize
+
+
+class BruteForceIndex:
+    """Exact cosine search over every enrolled embedding.
+
+    Vectors are L2-normalised on insert and kept in one float32 matrix that
+    grows geometrically, so incremental adds are amortised O(1). Adding an id
+    that is already present replaces its vector.
+    """
+
+    kind = 'exact'
+
+    def __init__(self, dim=512):
+        self.dim = dim
+        self._ids = np.empty(0, dtype=object)
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+        self._size = 0
+        self._pos = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def ids(self):
+        return self._ids[:self._size]
+
+    @property
+    def vectors(self):
+        return self._vectors[:self._size]
+
+    def add(self, ids, vectors):
+        vectors = l2_normalize(np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim))
+        with self._lock:
+            rows = []
+            for id_, vec in zip(ids, vectors):
+                row = self._pos.get(id_)
+                if row is None:
+                    row = self._append(id_)
+                self._vectors[row] = vec
+                rows.append(row)
+            self._added(np.asarray(rows, dtype=np.int64))
+
+    def search(self, queries, k=1):
+        """Top-``k`` ids and cosine scores for each query row.
+
+        Returns ``(ids, scores)`` of shape ``(queries, k)``; slots beyond the
+        number of candidates hold ``None`` and ``-1.0``.
+        """
+        queries = l2_normalize(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+        best_rows = np.full((len(queries), k), -1, dtype=np.int64)
+        best_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        with self._lock:
+            self._scan(queries, best_rows, best_scores)
+            order = np.argsort(-best_scores, axis=1, kind='stable')
+            best_rows = np.take_along_axis(best_rows, order, axis=1)
+            best_scores = np.take_along_axis(best_scores, order, axis=1)
+            hit = best_rows >= 0
+            ids = np.full(best_rows.shape, None, dtype=object)
+            ids[hit] = self._ids[best_rows[hit]]
+        return ids, np.where(hit, best_scores, -1.0).astype(np.float32)
+
+    def save(self, path):
+        with self._lock:
+            state = self._state()
+        tmp = f"{path}.tmp.npz"
+        np.savez(tmp, **state)
+        os.replace(tmp, path)
+
+    def _scan(self, queries, best_rows, best_scores):
+        k = min(best_rows.shape[1], self._size)
+        if k:
+            sims = queries @ self.vectors.T
+            top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+            best_rows[:, :k] = top
+            best_scores[:, :k] = np.take_along_axis(sims, top, axis=1)
+
+    def _added(self, rows):
+        pass
+
+    def _append(self, id_):
+        if self._size == len(self._vectors):
+            capacity = max(1024, 2 * len(self._vectors))
+            vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+            vectors[:self._size] = self.vectors
+            ids = np.empty(capacity, dtype=object)
+            ids[:self._size] = self.ids
+            self._vectors, self._ids = vectors, ids
+        row = self._size
+        self._ids[row] = id_
+        self._pos[id_] = row
+        self._size += 1
+        return row
+
+    def _state(self):
+        return {
+            "kind": np.array(self.kind),
+            "dim": np.array(self.dim),
+            "ids": np.asarray(self.ids, dtype=str),
+            "vectors": self.vectors,
+        }
+
+    def _load_state(self, state):
+        self.add([str(i) for i in state["ids"]], state["vectors"])
+
+
+class IVFIndex(BruteForceIndex):
+    """Inverted-file approximate index.
+
+    A k-means coarse quantiser splits the gallery into ``nlist`` cells and a
+    query is only scored against the ``nprobe`` cells closest to it. Until
+    the index holds ``nlist * min_cell_size`` vectors it is not trained and
+    behaves exactly like ``BruteForceIndex``; once trained, new vectors are
+    assigned to their nearest existing centroid. Call ``train`` again to
+    re-fit centroids after the gallery has grown a lot.
+    """
+
+    kind = 'ivf'
+
+    def __init__(self, dim=512, nlist=256, nprobe=16, min_cell_size=8, seed=0):
+        super().__init__(dim)
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_cell_size = min_cell_size
+        self.seed = seed
+        self.centroids = None
+        self._assign = np.zeros(0, dtype=np.int32)
+        self._lists = None
+
+    def train(self, iterations=10):
+        with self._lock:
+            data = self.vectors
+            rng = np.random.default_rng(self.seed)
+            centroids = data[rng.choice(len(data), size=min(self.nlist, len(data)), replace=False)].copy()
+            for _ in range(iterations):
+                assign = np.argmax(data @ centroids.T, axis=1)
+                for c in range(len(centroids)):
+                    members = data[assign == c]
+                    if len(members):
+                        centroids[c] = members.mean(axis=0)
+                centroids = l2_normalize(centroids)
+            self.centroids = centroids
+            self._assign = np.argmax(data @ centroids.T, axis=1).astype(np.int32)
+            self._lists = None
+
+    def _added(self, rows):
+        if self.centroids is None:
+            if len(self) >= self.nlist * self.min_cell_size:
+                self.train()
+            return
+        if len(self._assign) < len(self._vectors):
+            assign = np.zeros(len(self._vectors), dtype=np.int32)
+            assign[:len(self._assign)] = self._assign
+            self._assign = assign
+        self._assign[rows] = np.argmax(self._vectors[rows] @ self.centroids.T, axis=1)
+        self._lists = None
+
+    def _scan(self, queries, best_rows, best_scores):
+        if self.centroids is None:
+            return super()._scan(queries, best_rows, best_scores)
+        if self._lists is None:
+            assign = self._assign[:self._size]
+            order = np.argsort(assign, kind='stable')
+            bounds = np.searchsorted(assign[order], np.arange(len(self.centroids) + 1))
+            self._lists = (order, bounds)
+        order, bounds = self._lists
+
+        # Visit each probed cell once and score every query that probes it
+        nprobe = min(self.nprobe, len(self.centroids))
+        probes = np.argpartition(-(queries @ self.centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+        flat = probes.ravel()
+        by_cell = np.argsort(flat, kind='stable')
+        cells, starts = np.unique(flat[by_cell], return_index=True)
+        for cell, start, end in zip(cells, starts, list(starts[1:]) + [len(flat)]):
+            rows = order[bounds[cell]:bounds[cell + 1]]
+            if not len(rows):
+                continue
+            qs = by_cell[start:end] // nprobe
+            _merge_top_k(best_rows, best_scores, qs, rows, queries[qs] @ self._vectors[rows].T)
+
+    def _state(self):
+        state = super()._state()
+        state.update(nlist=np.array(self.nlist), nprobe=np.array(self.nprobe))
+        if self.centroids is not None:
+            state["centroids"] = self.centroids
+        return state
+
+    def _load_state(self, state):
+        if "centroids" in state:
+            self.centroids = state["centroids"].astype(np.float32)
+        super()._load_state(state)
+
+
+def _merge_top_k(best_rows, best_scores, qs, rows, sims):
+    """Fold ``sims`` (queries ``qs`` x ``rows``) into the running top-k."""
+    k = best_rows.shape[1]
+    scores = np.concatenate([best_scores[qs], sims], axis=1)
+    cand = np.concatenate([best_rows[qs], np.broadcast_to(rows, sims.shape)], axis=1)
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    best_scores[qs] = np.take_along_axis(scores, top, axis=1)
+    best_rows[qs] = np.take_along_axis(cand, top, axis=1)
+
+
+INDEX_KINDS = {cls.kind: cls for cls in (BruteForceIndex, IVFIndex)}
+
+
+def build_index(kind='exact', dim=512, **params):
+    cls = INDEX_KINDS.get(kind)
+    if cls is None:
+        raise ValueError(f"Unknown index kind: {kind}")
+    return cls(dim=dim, **params) if cls is IVFIndex else cls(dim=dim)
+
+
+def load_index(path, **params):
+    """Load an index written by ``save``; ``params`` override saved settings."""
+    with np.load(path, allow_pickle=False) as data:
+        state = {key: data[key] for key in data.files}
+    kind = str(state["kind"])
+    if kind == IVFIndex.kind:
+        params = dict({"nlist": int(state["nlist"]), "nprobe": int(state["nprobe"])}, **params)
+    index = build_index(kind, dim=int(state["dim"]), **params)
+    index._load_state(state)
+    return index
@@ -0,0 +1,124 @@
+import csv
+import re
+import zipfile
+from io import StringIO
+from xml.sax.saxutils import escape
+
+CHUNK_BYTES = 64 * 1024
+
+_INVALID_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+_INVALID_SHEET = re.compile(r'[\[\]:*?/\\]')
+
+
+def iter_csv(rows):
+    """Encode ``rows`` as CSV, yielding roughly CHUNK_BYTES at a time."""
+    buf = StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        writer.writerow(row)
+        if buf.tell() >= CHUNK_BYTES:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+
+class _Sink:
+    """Write-only, unseekable file object; zipfile then streams entries with
+    data descriptors and we hand out whatever it has written so far."""
+
+    def __init__(self):
+        self._parts = []
+        self.size = 0
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._parts)
+        self._parts = []
+        self.size = 0
+        return data
+
+
+def _cell(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f'<c><v>{value}</v></c>'
+    text = escape(_INVALID_XML.sub('', str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _sheet_name(name, taken):
+    base = _INVALID_SHEET.sub(' ', str(name)).strip()[:31] or 'Sheet'
+    candidate, n = base, 2
+    while candidate.lower() in taken:
+        suffix = f' ({n})'
+        candidate = base[:31 - len(suffix)] + suffix
+        n += 1
+    taken.add(candidate.lower())
+    return candidate
+
+
+def iter_xlsx(sheets):
+    """Stream a minimal XLSX workbook.
+
+    ``sheets`` is an iterable of ``(name, rows)``; rows are written as they
+    are produced, so memory stays flat however many rows a sheet has. Numbers
+    become numeric cells, everything else an inline string.
+    """
+    sink = _Sink()
+    book = zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED)
+    names, taken = [], set()
+
+    for n, (name, rows) in enumerate(sheets, 1):
+        names.append(_sheet_name(name, taken))
+        with book.open(f'xl/worksheets/sheet{n}.xml', 'w', force_zip64=True) as part:
+            part.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                       b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                       b'<sheetData>')
+            for row in rows:
+                part.write(('<row>' + ''.join(_cell(v) for v in row) + '</row>').encode('utf-8'))
+                if sink.size >= CHUNK_BYTES:
+                    yield sink.drain()
+            part.write(b'</sheetData></worksheet>')
+        yield sink.drain()
+
+    sheet_ids = range(1, len(names) + 1)
+    book.writestr('[Content_Types].xml', (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        + ''.join(f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+                  'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                  for i in sheet_ids)
+        + '</Types>'))
+    book.writestr('_rels/.rels', (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/></Relationships>'))
+    book.writestr('xl/workbook.xml', (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><sheets>'
+        + ''.join(f'<sheet name="{escape(name, {chr(34): "&quot;"})}" sheetId="{i}" r:id="rId{i}"/>'
+                  for i, name in zip(sheet_ids, names))
+        + '</sheets></workbook>'))
+    book.writestr('xl/_rels/workbook.xml.rels', (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        + ''.join(f'<Relationship Id="rId{i}" '
+                  'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+                  f'Target="worksheets/sheet{i}.xml"/>' for i in sheet_ids)
+        + '</Relationships>'))
+    book.close()
+    yield sink.drain()
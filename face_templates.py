@@ -0,0 +1,60 @@
+import numpy as np
+
+from matcher import l2_normalize
+
+# A student's stored embedding stack: row 0 is the quality-weighted centroid,
+# rows 1.. are the individual templates. Single-row stacks (students
+# enrolled before templates existed) act as both.
+ALIGNED_FACE_PX = 112  # ArcFace input side; larger faces carry no extra detail
+
+
+def face_quality(face, min_score=0.5, min_face_px=40):
+    """Weight of one detected face as an enrollment template: the detector
+    score, scaled down for faces smaller than the recogniser's input. Faces
+    below ``min_score`` or ``min_face_px`` on the short side score 0."""
+    x1, y1, x2, y2 = face.bbox[:4]
+    side = min(x2 - x1, y2 - y1)
+    score = float(face.det_score) if face.det_score is not None else 1.0
+    if score < min_score or side < min_face_px:
+        return 0.0
+    return score * min(1.0, side / ALIGNED_FACE_PX)
+
+
+def build_templates(embeddings, weights, max_templates=5):
+    """Stack of the weighted centroid over all embeddings followed by the
+    ``max_templates`` highest-weighted embeddings."""
+    embeddings = l2_normalize(np.atleast_2d(embeddings))
+    weights = np.asarray(weights, dtype=np.float32)
+    centroid = l2_normalize(weights @ embeddings)
+    keep = np.argsort(-weights, kind='stable')[:max_templates]
+    return np.vstack([centroid, embeddings[keep]])
+
+
+def split_templates(stack):
+    """``(centroid, templates)`` of a stored stack."""
+    stack = np.atleast_2d(stack)
+    return stack[0], stack[1:] if len(stack) > 1 else stack
+
+
+def match_vectors(stack, use_centroid=True):
+    """Rows the matcher should score a student against."""
+    centroid, templates = split_templates(stack)
+    return stack if use_centroid or len(stack) == 1 else templates
+
+
+def refresh_templates(stack, embedding, max_templates=5):
+    """Fold a confirmed attendance face into a student's stack.
+
+    Below ``max_templates`` the face is appended; otherwise it replaces the
+    template it is most similar to, so the set keeps its spread of poses and
+    lighting instead of collapsing onto recent photos. The centroid becomes
+    the mean of the templates.
+    """
+    _, templates = split_templates(stack)
+    embedding = l2_normalize(embedding)
+    if len(templates) < max_templates:
+        templates = np.vstack([templates, embedding])
+    else:
+        templates = templates.copy()
+        templates[np.argmax(templates @ embedding)] = embedding
+    return np.vstack([l2_normalize(templates.mean(axis=0)), templates])
@@ -0,0 +1,146 @@
+import numpy as np
+
+from matcher import l2_normalize
+
+# cv2 is imported where it is used, as in image_pipeline.
+
+FLOW_GRID = 4  # optical-flow points per box side
+
+
+def box_iou(a, b):
+    """Pairwise IoU of ``[x1, y1, x2, y2]`` rows, shape ``(len(a), len(b))``."""
+    a = np.asarray(a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float32).reshape(-1, 4)
+    tl = np.maximum(a[:, None, :2], b[None, :, :2])
+    br = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.prod(np.clip(br - tl, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def track_weight(hits, min_hits=3):
+    """Factor on a track's match scores, below 1 when it was detected on
+    fewer than ``min_hits`` keyframes: one sighting needs a much closer
+    match than a face seen throughout the clip."""
+    return min(1.0, hits / min_hits) ** 0.5
+
+
+class Track:
+    """One face followed across frames.
+
+    The embeddings of every keyframe detection are summed weighted by
+    detector score; ``embedding`` is their normalised mean, so a track can
+    stand in for a ``Face`` when matching. ``best_face`` is the detection
+    with the highest score.
+    """
+
+    def __init__(self, track_id, face, frame, det_scale=1.0):
+        self.id = track_id
+        self.hits = 0
+        self.missed = 0
+        self.first_frame = frame
+        self.best_face = None
+        self._sum = None
+        self.add(face, frame, det_scale)
+
+    def add(self, face, frame, det_scale=1.0):
+        weighted = l2_normalize(face.embedding) * float(face.det_score)
+        self._sum = weighted if self._sum is None else self._sum + weighted
+        self.bbox = np.asarray(face.bbox[:4], dtype=np.float32) / det_scale
+        self.hits += 1
+        self.missed = 0
+        self.last_frame = frame
+        if self.best_face is None or face.det_score > self.best_face.det_score:
+            self.best_face = face
+
+    @property
+    def embedding(self):
+        return l2_normalize(self._sum)
+
+
+class FaceTracker:
+    """Links keyframe detections into tracks and carries the boxes across
+    the frames in between with sparse optical flow.
+
+    A detection joins the live track it overlaps most (IoU at least
+    ``iou_threshold``) provided their embeddings agree (cosine at least
+    ``min_similarity``), so neighbours who lean into each other's box do
+    not merge. A track missed on more than ``max_missed`` keyframes in a
+    row ends. Flow runs on grayscale frames downscaled to ``flow_width``;
+    callers may buffer those (see ``flow_frame``) instead of full images.
+    """
+
+    def __init__(self, iou_threshold=0.3, min_similarity=0.3, max_missed=3, flow_width=640):
+        self.iou_threshold = iou_threshold
+        self.min_similarity = min_similarity
+        self.max_missed = max_missed
+        self.flow_width = flow_width
+        self.tracks = []  # every track, ended ones included
+        self._live = []
+        self._prev = None
+
+    def flow_frame(self, img):
+        """Downscaled grayscale copy of ``img`` and its scale."""
+        import cv2
+        scale = min(1.0, self.flow_width / img.shape[1])
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        if scale < 1.0:
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        return gray, scale
+
+    def step(self, frame_no, flow_frame, faces=None, det_scale=1.0):
+        """Advance to the next frame; ``faces`` are its detections on
+        keyframes, found on the frame resized by ``det_scale``. Returns the
+        track each face was assigned to."""
+        gray, scale = flow_frame
+        if self._prev is not None and self._live and self._prev[0].shape == gray.shape:
+            self._propagate(self._prev[0], gray, scale)
+        self._prev = flow_frame
+        return self._associate(frame_no, faces, det_scale) if faces is not None else []
+
+    def _propagate(self, prev, gray, scale):
+        import cv2
+        boxes = np.array([t.bbox for t in self._live], dtype=np.float32) * scale
+        # A grid over the inner half of each box, clear of hair and background
+        g = np.linspace(0.25, 0.75, FLOW_GRID, dtype=np.float32)
+        offsets = np.stack(np.meshgrid(g, g), axis=-1).reshape(-1, 2)
+        points = boxes[:, None, :2] + (boxes[:, None, 2:] - boxes[:, None, :2]) * offsets[None]
+        moved, status, _ = cv2.calcOpticalFlowPyrLK(
+            prev, gray, points.reshape(-1, 1, 2), None, winSize=(15, 15), maxLevel=2
+        )
+        delta = (moved.reshape(points.shape) - points) / scale
+        ok = status.reshape(points.shape[:2]).astype(bool)
+        for track, d, good in zip(self._live, delta, ok):
+            if good.sum() >= len(offsets) // 4:
+                track.bbox = track.bbox + np.tile(np.median(d[good], axis=0), 2)
+
+    def _associate(self, frame_no, faces, det_scale):
+        assigned = [None] * len(faces)
+        matched = set()
+        if faces and self._live:
+            overlap = box_iou([t.bbox for t in self._live], [np.asarray(f.bbox[:4]) / det_scale for f in faces])
+            sim = np.array([t.embedding for t in self._live]) @ l2_normalize([f.embedding for f in faces]).T
+            overlap[(overlap < self.iou_threshold) | (sim < self.min_similarity)] = 0
+            for flat in np.argsort(overlap, axis=None)[::-1]:
+                t, f = np.unravel_index(flat, overlap.shape)
+                if overlap[t, f] <= 0:
+                    break
+                if t in matched or assigned[f] is not None:
+                    continue
+                self._live[t].add(faces[f], frame_no, det_scale)
+                assigned[f] = self._live[t]
+                matched.add(t)
+        live = []
+        for t, track in enumerate(self._live):
+            if t not in matched:
+                track.missed += 1
+            if track.missed <= self.max_missed:
+                live.append(track)
+        for f, face in enumerate(faces):
+            if assigned[f] is None:
+                assigned[f] = Track(len(self.tracks), face, frame_no, det_scale)
+                self.tracks.append(assigned[f])
+                live.append(assigned[f])
+        self._live = live
+        return assigned
@@ -0,0 +1,123 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from matcher import GalleryMatcher
+
+
+class Gallery:
+    """A cohort's enrollment numbers, names and embedding matcher.
+
+    Rows line up across all three, so ``matcher`` indices can be used to look
+    up ``enrollment_nos`` and ``names`` directly.
+    """
+
+    def __init__(self, enrollment_nos, names, matcher):
+        self.enrollment_nos = np.asarray(enrollment_nos, dtype=str)
+        self.names = np.asarray(names, dtype=str)
+        self.matcher = matcher
+
+    def __len__(self):
+        return len(self.enrollment_nos)
+
+    @property
+    def nbytes(self):
+        return (self.enrollment_nos.nbytes + self.names.nbytes
+                + self.matcher.nbytes)
+
+    @classmethod
+    def from_rows(cls, rows, threshold=0.3, assignment='greedy'):
+        """Build from ``(enrollment_no, full_name, face_embedding)`` rows."""
+        rows = list(rows)
+        return cls(
+            [r[0] for r in rows],
+            [r[1] for r in rows],
+            GalleryMatcher([r[2] for r in rows], threshold=threshold, assignment=assignment)
+        )
+
+
+class GalleryCache:
+    """Process-wide LRU cache of cohort galleries keyed by (year, semester).
+
+    Entries are evicted least-recently-used first whenever either the entry
+    count or the total size of the cached arrays exceeds its cap. The cache is
+    local to the process, so every worker keeps (and invalidates) its own;
+    changes made by other processes are caught by the ``version`` callers
+    pass to ``get`` (an entry cached under another version is reloaded) and,
+    failing that, by entries expiring ``ttl`` seconds after loading.
+    Loaders run outside the lock; a gallery whose key was invalidated while
+    it was loading is returned to its caller but not cached.
+    """
+
+    def __init__(self, max_entries=32, max_bytes=256 * 1024 * 1024, ttl=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (gallery, version, loaded at)
+        self._bytes = 0
+        self._generations = {}  # bumped by invalidate(key)
+        self._epoch = 0  # bumped by invalidate()
+        self._lock = threading.Lock()
+
+    def get(self, key, loader, version=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._fresh(entry, version):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            generation = (self._epoch, self._generations.get(key, 0))
+
+        gallery = loader()
+        with self._lock:
+            if generation != (self._epoch, self._generations.get(key, 0)):
+                return gallery
+            self._discard(key)
+            if gallery.nbytes <= self.max_bytes:
+                self._entries[key] = (gallery, version, time.monotonic())
+                self._bytes += gallery.nbytes
+                self._evict()
+        return gallery
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._bytes = 0
+                self._epoch += 1
+            else:
+                self._discard(key)
+                self._generations[key] = self._generations.get(key, 0) + 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _fresh(self, entry, version):
+        _, cached_version, loaded_at = entry
+        if version is not None and version != cached_version:
+            return False
+        return self.ttl is None or time.monotonic() - loaded_at < self.ttl
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[0].nbytes
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (gallery, _, _) = self._entries.popitem(last=False)
+            self._bytes -= gallery.nbytes
+            self.evictions += 1
@@ -0,0 +1,155 @@
+import hashlib
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+import numpy as np
+
+# cv2 is imported where it is used: it adds noticeably to app start-up and
+# most processes (CLI commands, report-only workers) never touch an image.
+
+
+def _no_timer(stage):
+    return nullcontext()
+
+
+class ImagePipeline:
+    """Thread pool for the image I/O around inference.
+
+    OpenCV releases the GIL while decoding, resizing and encoding, so photos
+    are decoded ahead of the detector and annotated images are encoded and
+    written behind it while the next photos run through the model. Saved
+    artifacts are downscaled to ``max_side`` (None keeps full size) and
+    written as JPEG at ``jpeg_quality``, optionally with a ``thumb_side``
+    thumbnail at ``thumb_quality``. ``timer(stage)`` may supply a context
+    manager that times the 'decode', 'upscale' and 'artifact_write' stages.
+    """
+
+    def __init__(self, workers=4, jpeg_quality=90, max_side=None, thumb_side=320, thumb_quality=80, timer=None):
+        self.jpeg_quality = jpeg_quality
+        self.max_side = max_side
+        self.thumb_side = thumb_side
+        self.thumb_quality = thumb_quality
+        self.timer = timer or _no_timer
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='image-io')
+
+    def decode_files(self, paths, prepare=None, prefetch=4):
+        """Yield ``(position, image)`` for ``paths`` in order, keeping at most
+        ``prefetch`` decoded images ahead of the consumer. ``prepare`` runs on
+        the pool right after decoding; unreadable files are skipped."""
+        pending = deque()
+        paths = enumerate(paths)
+
+        def fill():
+            while len(pending) < prefetch:
+                item = next(paths, None)
+                if item is None:
+                    return
+                pending.append((item[0], self._pool.submit(self._read, item[1], prepare)))
+
+        fill()
+        while pending:
+            position, future = pending.popleft()
+            img = future.result()
+            fill()
+            if img is not None:
+                yield position, img
+
+    def decode_video(self, path, sample_fps=None, max_frames=None):
+        """Yield ``(frame_number, image)`` for ``path`` at about ``sample_fps``
+        frames per second (None keeps every frame), at most ``max_frames``.
+        Skipped frames are grabbed but never decoded. A file OpenCV cannot
+        open yields nothing."""
+        import cv2
+        cap = cv2.VideoCapture(path)
+        try:
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            step = max(1, round(fps / sample_fps)) if sample_fps and fps > 0 else 1
+            frame_no = sampled = 0
+            while cap.isOpened() and (max_frames is None or sampled < max_frames):
+                if not cap.grab():
+                    break
+                if frame_no % step == 0:
+                    with self.timer('decode'):
+                        ok, img = cap.retrieve()
+                    if ok:
+                        sampled += 1
+                        yield frame_no, img
+                frame_no += 1
+        finally:
+            cap.release()
+
+    def decode_bytes(self, blobs):
+        """Decode encoded images in parallel; undecodable entries become None."""
+        return list(self._pool.map(self._decode, blobs))
+
+    def save_annotated(self, path, img, marks, thumb_path=None):
+        """Queue drawing ``marks`` (``(bbox, label, color)``) on ``img`` and
+        writing it to ``path`` (and a thumbnail to ``thumb_path``). ``img``
+        must not be modified by the caller afterwards. The Future resolves
+        to a dict with the stored size, byte count and content hash."""
+        return self._pool.submit(self._write, path, img, marks, thumb_path)
+
+    def _read(self, path, prepare):
+        import cv2
+        with self.timer('decode'):
+            img = cv2.imread(path, cv2.IMREAD_COLOR)
+        if img is not None and prepare is not None:
+            with self.timer('upscale'):
+                img = prepare(img)
+        return img
+
+    def _decode(self, data):
+        import cv2
+        with self.timer('decode'):
+            return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+    def _write(self, path, img, marks, thumb_path=None):
+        with self.timer('artifact_write'):
+            return self._draw_and_write(path, img, marks, thumb_path)
+
+    def _draw_and_write(self, path, img, marks, thumb_path):
+        import cv2
+        width = img.shape[1]
+        img = _fit(img, self.max_side)
+        scale = img.shape[1] / width
+        for bbox, label, color in marks:
+            x1, y1, x2, y2 = (np.asarray(bbox[:4]) * scale).astype(int)
+            cv2.rectangle(img, (x1, y1), (x2, y2), color, 2)
+            cv2.putText(img, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+        data = _write_jpeg(path, img, self.jpeg_quality)
+        info = {
+            "path": path,
+            "width": img.shape[1],
+            "height": img.shape[0],
+            "bytes": len(data),
+            "etag": hashlib.blake2b(data, digest_size=12).hexdigest(),
+        }
+        if thumb_path is not None:
+            _write_jpeg(thumb_path, _fit(img, self.thumb_side), self.thumb_quality)
+            info["thumb_path"] = thumb_path
+        return info
+
+
+def _fit(img, max_side):
+    import cv2
+    h, w = img.shape[:2]
+    if not max_side or max(h, w) <= max_side:
+        return img
+    scale = max_side / max(h, w)
+    return cv2.resize(img, (round(w * scale), round(h * scale)), interpolation=cv2.INTER_AREA)
+
+
+def _write_jpeg(path, img, quality):
+    import cv2
+    ok, buf = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, int(quality)])
+    if not ok:
+        raise ValueError(f"Could not encode {path}")
+    data = buf.tobytes()
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as fh:
+        fh.write(data)
+    os.replace(tmp, path)
+    return data
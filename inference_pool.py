@@ -0,0 +1,140 @@
+import multiprocessing as mp
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from recognition import detect_and_embed
+
+MODEL_NAME = "buffalo_l"
+# buffalo_l also ships landmark and gender/age models; attendance only needs these
+MODEL_MODULES = ['detection', 'recognition']
+
+_face_app = None
+_face_app_lock = threading.Lock()
+
+
+def load_face_app(det_size=(1280, 1280), intra_op_threads=None):
+    from insightface.app import FaceAnalysis
+    face_app = FaceAnalysis(name=MODEL_NAME, allowed_modules=MODEL_MODULES, providers=['CPUExecutionProvider'])
+    face_app.prepare(ctx_id=-1, det_size=det_size)
+    if intra_op_threads:
+        set_intra_op_threads(face_app, intra_op_threads)
+    return face_app
+
+
+def set_intra_op_threads(face_app, threads):
+    """Recreate every model session with a fixed intra-op thread count.
+
+    FaceAnalysis does not forward ONNX Runtime session options, so the
+    sessions are rebuilt from the same model files after loading.
+    """
+    import onnxruntime
+    opts = onnxruntime.SessionOptions()
+    opts.intra_op_num_threads = threads
+    opts.inter_op_num_threads = 1
+    for model in face_app.models.values():
+        model.session = onnxruntime.InferenceSession(
+            model.model_file, sess_options=opts, providers=['CPUExecutionProvider']
+        )
+
+
+def get_face_app(det_size=(1280, 1280), intra_op_threads=None):
+    """This process's model, loaded on first use."""
+    global _face_app
+    with _face_app_lock:
+        if _face_app is None:
+            _face_app = load_face_app(det_size, intra_op_threads)
+        return _face_app
+
+
+def _init_worker(det_size, intra_op_threads):
+    global _face_app
+    _face_app = load_face_app(det_size, intra_op_threads)
+
+
+def _infer_shared(shm_name, shape, dtype, detection=None):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        img = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        faces = detect_and_embed(_face_app, [img], detection=detection)[0]
+        del img  # the segment cannot be closed while a view on it is alive
+        return [dict(face) for face in faces]
+    finally:
+        shm.close()
+
+
+class InferencePool:
+    """Pool of worker processes that each hold their own FaceAnalysis model.
+
+    Images are handed to the workers through shared memory, so only the
+    segment name and shape cross the process boundary; the detected faces
+    (boxes, landmarks, scores and embeddings) come back as small pickles.
+    Workers are started with the ``spawn`` method so ONNX Runtime never
+    inherits a half-initialised state from the parent. If a worker dies
+    (e.g. OOM-killed), ``map`` raises ``BrokenProcessPool`` instead of
+    waiting forever, and the pool is restarted for the next call.
+    """
+
+    def __init__(self, workers, det_size=(1280, 1280), intra_op_threads=None):
+        self.workers = workers
+        self._initargs = (det_size, intra_op_threads)
+        self._lock = threading.Lock()
+        self._executor = self._start()
+
+    def _start(self):
+        return ProcessPoolExecutor(
+            self.workers, mp_context=mp.get_context('spawn'),
+            initializer=_init_worker, initargs=self._initargs
+        )
+
+    def _restart(self, broken):
+        with self._lock:
+            if self._executor is broken:
+                self._executor = self._start()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def get(self, img, detection=None):
+        return self.map([img], detection=detection)[0]
+
+    def map(self, imgs, detection=None):
+        """Run detection and recognition on ``imgs`` across the pool."""
+        from insightface.app.common import Face
+        executor = self._executor
+        segments, pending = [], []
+        try:
+            for img in imgs:
+                img = np.ascontiguousarray(img)
+                shm = shared_memory.SharedMemory(create=True, size=max(img.nbytes, 1))
+                segments.append(shm)
+                np.ndarray(img.shape, dtype=img.dtype, buffer=shm.buf)[...] = img
+                pending.append(executor.submit(
+                    _infer_shared, shm.name, img.shape, img.dtype.str, detection
+                ))
+            return [[Face(d) for d in p.result()] for p in pending]
+        except BrokenProcessPool:
+            self._restart(executor)
+            raise
+        finally:
+            for shm in segments:
+                shm.close()
+                shm.unlink()
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_inference_pool(workers, det_size=(1280, 1280), intra_op_threads=None):
+    """Process-wide pool, created on first use rather than at import so that
+    spawned children re-importing the app do not start pools of their own."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = InferencePool(workers, det_size=det_size, intra_op_threads=intra_op_threads)
+        return _pool
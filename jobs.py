@@ -0,0 +1,108 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Job:
+    """State of one background job, updated by the worker running it."""
+
+    def __init__(self, job_id, owner=None):
+        self.id = job_id
+        self.owner = owner
+        self.status = 'queued'
+        self.progress = 0.0
+        self.message = ''
+        self.attempts = 0
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    def report(self, done, total, message=''):
+        self.progress = round(done / total, 3) if total else 0.0
+        self.message = message
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "progress": self.progress,
+            "message": self.message,
+            "attempts": self.attempts,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobQueue:
+    """Bounded in-process job queue backed by a thread pool.
+
+    ``submit`` returns immediately with a job id; the callable runs on one of
+    ``max_workers`` threads as ``fn(job, *args)`` and may report progress via
+    ``job.report``. A failing job is retried up to ``max_retries`` times with a
+    linear back-off before it is marked failed. At most ``max_pending`` jobs
+    may be queued or running at once, and the last ``max_history`` finished
+    jobs are kept around for status polling.
+    """
+
+    def __init__(self, max_workers=2, max_pending=16, max_retries=2, retry_delay=2.0, max_history=200):
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.max_history = max_history
+        self._jobs = OrderedDict()
+        self._active = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='attendance-job')
+
+    def submit(self, fn, *args, owner=None, cleanup=None):
+        with self._lock:
+            if self._active >= self.max_pending:
+                raise QueueFull("Too many attendance jobs in progress, please retry shortly")
+            job = Job(uuid.uuid4().hex, owner=owner)
+            self._jobs[job.id] = job
+            self._active += 1
+            self._trim()
+        self._executor.submit(self._run, job, fn, args, cleanup)
+        return job.id
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job, fn, args, cleanup):
+        try:
+            while True:
+                job.attempts += 1
+                job.status = 'running'
+                try:
+                    job.result = fn(job, *args)
+                    job.status = 'done'
+                    job.progress = 1.0
+                    job.message = 'Completed'
+                    job.error = None
+                    return
+                except Exception as e:
+                    job.error = str(e)
+                    if job.attempts > self.max_retries:
+                        job.status = 'failed'
+                        return
+                    job.status = 'retrying'
+                    time.sleep(self.retry_delay * job.attempts)
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._active -= 1
+            if cleanup is not None:
+                cleanup()
+
+    def _trim(self):
+        finished = [j.id for j in self._jobs.values() if j.finished_at is not None]
+        for job_id in finished[:max(0, len(finished) - self.max_history)]:
+            del self._jobs[job_id]
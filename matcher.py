@@ -0,0 +1,120 @@
+import numpy as np
+
+
+def l2_normalize(x, axis=-1):
+    x = np.asarray(x, dtype=np.float32)
+    return x / (np.linalg.norm(x, axis=axis, keepdims=True) + 1e-12)
+
+
+class MatchResult:
+    """Outcome of matching the faces of one photo against a gallery.
+
+    ``student_idx[i]`` is the gallery row assigned to face ``i`` (or -1 when
+    the face stays Unknown) and ``scores[i]`` is the cosine similarity of that
+    assignment, or the best similarity seen for faces left unassigned.
+    """
+
+    def __init__(self, student_idx, scores):
+        self.student_idx = student_idx
+        self.scores = scores
+
+    def __len__(self):
+        return len(self.student_idx)
+
+
+class GalleryMatcher:
+    """Scores every face of a photo against the whole cohort in one matmul.
+
+    The cohort's embeddings are normalised once and kept as a contiguous
+    float32 matrix. Identities are then assigned by best match with at most
+    one face per student, either greedily over all (face, student) pairs in
+    descending similarity or optimally with the Hungarian algorithm.
+    Students without an embedding stay in the gallery (so row indices line up
+    with the caller's list) but can never be matched.
+
+    A student may also be given a ``(templates, dim)`` stack; their score is
+    then the best of their templates, reduced over one similarity matrix.
+    """
+
+    ASSIGNMENTS = ('greedy', 'hungarian')
+
+    def __init__(self, embeddings, threshold=0.3, assignment='greedy'):
+        if assignment not in self.ASSIGNMENTS:
+            raise ValueError(f"Unknown assignment strategy: {assignment}")
+        self.threshold = float(threshold)
+        self.assignment = assignment
+
+        rows = [None if e is None else np.atleast_2d(np.asarray(e, dtype=np.float32)) for e in embeddings]
+        dim = next((e.shape[1] for e in rows if e is not None and e.size), 0)
+        valid = np.array([e is not None and e.size > 0 and e.shape[1] == dim for e in rows], dtype=bool)
+        counts = np.array([len(e) if ok else 0 for e, ok in zip(rows, valid)], dtype=np.int64)
+        matrix = np.zeros((int(counts.sum()), dim), dtype=np.float32)
+        if len(matrix):
+            matrix[:] = np.vstack([e for e, ok in zip(rows, valid) if ok])
+            matrix = l2_normalize(matrix)
+        self.embeddings = np.ascontiguousarray(matrix)
+        self.valid = valid
+        self._starts = (np.cumsum(counts) - counts)[valid]
+        self._single = bool((counts[valid] == 1).all())
+
+    def __len__(self):
+        return len(self.valid)
+
+    @property
+    def nbytes(self):
+        return self.embeddings.nbytes + self.valid.nbytes + self._starts.nbytes
+
+    def similarity(self, face_embs):
+        """Cosine similarity matrix of shape (faces, students)."""
+        faces = np.atleast_2d(np.asarray(face_embs, dtype=np.float32))
+        sim = np.full((faces.shape[0], len(self)), -1.0, dtype=np.float32)
+        if not self.valid.any():
+            return sim
+        per_template = l2_normalize(faces) @ self.embeddings.T
+        if self._single:
+            sim[:, self.valid] = per_template
+        else:
+            sim[:, self.valid] = np.maximum.reduceat(per_template, self._starts, axis=1)
+        return sim
+
+    def match(self, face_embs, weights=None):
+        """Assign faces to students. ``weights``, one per face, scale that
+        face's similarities before assignment and thresholding (the returned
+        scores are scaled too), so a less trusted face loses ties it would
+        otherwise win."""
+        n_faces = len(face_embs)
+        student_idx = np.full(n_faces, -1, dtype=np.int64)
+        if not n_faces or not len(self):
+            return MatchResult(student_idx, np.zeros(n_faces, dtype=np.float32))
+
+        sim = self.similarity(face_embs)
+        if weights is not None:
+            sim *= np.asarray(weights, dtype=np.float32)[:, None]
+        scores = sim.max(axis=1)
+        if self.assignment == 'hungarian':
+            pairs = self._hungarian(sim)
+        else:
+            pairs = self._greedy(sim)
+        for f, s in pairs:
+            student_idx[f] = s
+            scores[f] = sim[f, s]
+        return MatchResult(student_idx, scores)
+
+    def _greedy(self, sim):
+        faces, students = np.nonzero(sim > self.threshold)
+        order = np.argsort(-sim[faces, students], kind='stable')
+        used_faces, used_students = set(), set()
+        for f, s in zip(faces[order], students[order]):
+            if f in used_faces or s in used_students:
+                continue
+            used_faces.add(f)
+            used_students.add(s)
+            yield int(f), int(s)
+
+    def _hungarian(self, sim):
+        from scipy.optimize import linear_sum_assignment
+        cost = np.where(sim > self.threshold, -sim, 1.0)
+        rows, cols = linear_sum_assignment(cost)
+        for f, s in zip(rows, cols):
+            if sim[f, s] > self.threshold:
+                yield int(f), int(s)
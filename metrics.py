@@ -0,0 +1,167 @@
+import cProfile
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Minimal Prometheus text-format metrics: enough for a handful of counters
+# and histograms without depending on prometheus_client.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + '}'
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, labels=()):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, _labels(self.labelnames, k), v) for k, v in sorted(self._values.items())]
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, labels=()):
+        with self._lock:
+            counts, total, count = self._values.get(labels, ([0] * len(self.buckets), 0.0, 0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[labels] = (counts, total + value, count + 1)
+
+    def samples(self):
+        out = []
+        names = self.labelnames + ('le',)
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._values.items()):
+                for bound, n in zip(self.buckets, counts):
+                    out.append((f'{self.name}_bucket', _labels(names, labels + (bound,)), n))
+                out.append((f'{self.name}_bucket', _labels(names, labels + ('+Inf',)), count))
+                out.append((f'{self.name}_sum', _labels(self.labelnames, labels), total))
+                out.append((f'{self.name}_count', _labels(self.labelnames, labels), count))
+        return out
+
+
+class Registry:
+    """Metrics plus ``collectors``: callables returning ``(name, kind, help,
+    value)`` tuples read at scrape time, for numbers other objects already
+    keep (cache hit counts and the like)."""
+
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def counter(self, name, help, labelnames=()):
+        metric = Counter(name, help, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, help, labelnames, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(f'{name}{labels} {value}' for name, labels, value in metric.samples())
+        for collect in self.collectors:
+            for name, kind, help, value in collect():
+                lines.extend((f'# HELP {name} {help}', f'# TYPE {name} {kind}', f'{name} {value}'))
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+STAGE_SECONDS = registry.histogram(
+    'facetrack_stage_seconds', 'Time spent in each recognition pipeline stage.', ['stage'])
+FACES_PER_IMAGE = registry.histogram(
+    'facetrack_faces_per_image', 'Faces detected per uploaded photo.',
+    buckets=(0, 1, 2, 5, 10, 20, 40, 60, 100, 200))
+STUDENTS_COMPARED = registry.counter(
+    'facetrack_students_compared_total', 'Face-to-student similarity scores computed by the matcher.')
+DB_QUERIES = registry.histogram(
+    'facetrack_db_queries', 'Database statements executed per request or background job.', ['endpoint'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000))
+REQUEST_SECONDS = registry.histogram(
+    'facetrack_request_seconds', 'Request latency by endpoint.', ['endpoint'])
+
+
+@contextmanager
+def stage(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, (name,))
+
+
+# Statement counting is per thread: a request, or a job on its worker thread
+_local = threading.local()
+
+
+def count_query(*_):
+    if getattr(_local, 'queries', None) is not None:
+        _local.queries += 1
+
+
+def start_query_count():
+    _local.queries = 0
+
+
+def stop_query_count():
+    count, _local.queries = getattr(_local, 'queries', None), None
+    return count or 0
+
+
+def dump_profile(profile, directory, name):
+    """Write ``profile`` to ``directory/<name>-<time>-<thread>.prof`` (open
+    with ``python -m pstats`` or snakeviz)."""
+    profile.disable()
+    os.makedirs(directory, exist_ok=True)
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    profile.dump_stats(os.path.join(directory, f"{name}-{stamp}-{threading.get_ident()}.prof"))
+
+
+@contextmanager
+def profiled(directory, name, enabled=True):
+    if not enabled:
+        yield
+        return
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        dump_profile(profile, directory, name)
@@ -0,0 +1,164 @@
+import math
+from contextlib import nullcontext
+
+import numpy as np
+
+DEFAULT_DETECTION = {
+    "mode": "fixed",            # 'fixed' keeps the model's prepared det_size
+    "min_size": 640,            # smallest detector input side, in pixels
+    "max_size": 1280,           # largest detector input side before tiling kicks in
+    "min_face_px": 64,          # smallest face expected, in source pixels (back row)
+    "target_face_px": 32,       # face width the detector handles reliably
+    "max_upscale": 2.0,         # never run the detector above this image scale
+    "tile_overlap": 0.25,       # fraction of a tile shared with its neighbour
+    "nms_iou": 0.4,
+}
+
+
+def _round_up(x, step=32):
+    return int(math.ceil(x / step) * step)
+
+
+def input_size_for(h, w, scale):
+    return _round_up(w * scale), _round_up(h * scale)
+
+
+def choose_det_scale(h, w, cfg):
+    """Pick the detector scale for an ``h`` x ``w`` image.
+
+    The smallest faces, ``min_face_px`` wide in the photo, should reach
+    the detector at about ``target_face_px``, which fixes the scale; it is
+    capped at ``max_upscale`` and raised until the long side is at least
+    ``min_size``. Returns ``(scale, tiles_x, tiles_y)``: when the input
+    would exceed ``max_size`` along an axis, as it does for high-resolution
+    photos, the image is split into overlapping tiles along it, each small
+    enough to run at ``scale`` within ``max_size``.
+    """
+    long_side = max(h, w)
+    scale = min(cfg["target_face_px"] / cfg["min_face_px"], cfg["max_upscale"])
+    scale = max(scale, min(cfg["min_size"] / long_side, cfg["max_upscale"]))
+
+    def _tiles(length):
+        tiles = 1
+        while _tile_span(length, tiles, cfg["tile_overlap"]) * scale > cfg["max_size"]:
+            tiles += 1
+        return tiles
+    return scale, _tiles(w), _tiles(h)
+
+
+def nms(dets, iou_thresh):
+    """Greedy non-maximum suppression over ``[x1, y1, x2, y2, score]`` rows."""
+    x1, y1, x2, y2, scores = dets[:, 0], dets[:, 1], dets[:, 2], dets[:, 3], dets[:, 4]
+    areas = (x2 - x1 + 1) * (y2 - y1 + 1)
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size > 0:
+        i = order[0]
+        keep.append(i)
+        xx1 = np.maximum(x1[i], x1[order[1:]])
+        yy1 = np.maximum(y1[i], y1[order[1:]])
+        xx2 = np.minimum(x2[i], x2[order[1:]])
+        yy2 = np.minimum(y2[i], y2[order[1:]])
+        inter = np.maximum(0.0, xx2 - xx1 + 1) * np.maximum(0.0, yy2 - yy1 + 1)
+        iou = inter / (areas[i] + areas[order[1:]] - inter)
+        order = order[np.where(iou <= iou_thresh)[0] + 1]
+    return np.asarray(keep, dtype=np.int64)
+
+
+def _tile_span(length, tiles, overlap):
+    if tiles == 1:
+        return length
+    return int(math.ceil(length / (tiles - (tiles - 1) * overlap)))
+
+
+def _tile_origins(length, tiles, overlap):
+    span = _tile_span(length, tiles, overlap)
+    if tiles == 1:
+        return [0], span
+    stride = (length - span) / (tiles - 1)
+    return [int(round(i * stride)) for i in range(tiles)], span
+
+
+def detect(det_model, img, detection=None):
+    """Run the detector in fixed or adaptive mode.
+
+    Returns ``(bboxes, kpss)`` in the coordinates of ``img``, like
+    ``RetinaFace.detect``. Adaptive mode picks the input size per image and
+    falls back to overlapping tiles merged with NMS for large photos.
+    """
+    cfg = dict(DEFAULT_DETECTION, **(detection or {}))
+    if cfg["mode"] != "adaptive":
+        return det_model.detect(img, max_num=0, metric='default')
+
+    h, w = img.shape[:2]
+    scale, tiles_x, tiles_y = choose_det_scale(h, w, cfg)
+    if tiles_x == tiles_y == 1:
+        return det_model.detect(img, input_size=input_size_for(h, w, scale), max_num=0, metric='default')
+
+    xs, tile_w = _tile_origins(w, tiles_x, cfg["tile_overlap"])
+    ys, tile_h = _tile_origins(h, tiles_y, cfg["tile_overlap"])
+    all_boxes, all_kps = [], []
+    for y in ys:
+        for x in xs:
+            tile = img[y:y + tile_h, x:x + tile_w]
+            bboxes, kpss = det_model.detect(
+                tile, input_size=input_size_for(tile.shape[0], tile.shape[1], scale), max_num=0, metric='default'
+            )
+            if bboxes.shape[0] == 0:
+                continue
+            bboxes[:, [0, 2]] += x
+            bboxes[:, [1, 3]] += y
+            all_boxes.append(bboxes)
+            if kpss is not None:
+                kpss[:, :, 0] += x
+                kpss[:, :, 1] += y
+                all_kps.append(kpss)
+
+    if not all_boxes:
+        return np.zeros((0, 5), dtype=np.float32), None
+    bboxes = np.vstack(all_boxes)
+    kpss = np.vstack(all_kps) if all_kps else None
+    keep = nms(bboxes, cfg["nms_iou"])
+    return bboxes[keep], (kpss[keep] if kpss is not None else None)
+
+
+def detect_and_embed(face_app, images, batch_size=64, detection=None, timer=None):
+    """Detect faces in every image, then embed all of them in large batches.
+
+    ``FaceAnalysis.get`` runs the recognition model once per face (and also
+    runs the landmark and gender/age models we never read). Here detection
+    still runs per image, but the aligned crops of every face across all
+    ``images`` go through ArcFace together, ``batch_size`` crops at a time.
+    ``detection`` overrides ``DEFAULT_DETECTION`` (see ``detect``). Returns
+    one list of ``Face`` objects per input image, like ``get``. ``timer``,
+    if given, is called with a stage name and must return a context manager
+    timing that stage.
+    """
+    from insightface.app.common import Face
+    from insightface.utils import face_align
+
+    det_model = face_app.det_model
+    rec_model = face_app.models['recognition']
+    crop_size = rec_model.input_size[0]
+
+    timer = timer or (lambda stage: nullcontext())
+
+    results, pending, crops = [], [], []
+    for img in images:
+        with timer('detection'):
+            bboxes, kpss = detect(det_model, img, detection)
+        faces = []
+        with timer('alignment'):
+            for i in range(bboxes.shape[0]):
+                face = Face(bbox=bboxes[i, 0:4], kps=kpss[i] if kpss is not None else None, det_score=bboxes[i, 4])
+                crops.append(face_align.norm_crop(img, landmark=face.kps, image_size=crop_size))
+                pending.append(face)
+                faces.append(face)
+        results.append(faces)
+
+    with timer('recognition'):
+        for start in range(0, len(crops), batch_size):
+            feats = rec_model.get_feat(crops[start:start + batch_size])
+            for face, feat in zip(pending[start:start + batch_size], np.asarray(feats)):
+                face.embedding = feat.flatten()
+    return results
@@ -0,0 +1,110 @@
+import numpy as np
+
+PRESENT, ABSENT, MISSING = 1, 0, -1
+STATUS_LABELS = {PRESENT: "Present", ABSENT: "Absent", MISSING: "-"}
+STATUS_CODES = {PRESENT: "P", ABSENT: "A", MISSING: "-"}
+
+
+class AttendanceMatrix:
+    """Student x session attendance for one subject/year/semester report.
+
+    ``status`` is an int8 matrix of PRESENT / ABSENT / MISSING codes with one
+    row per student (in ``enrollment_nos`` order) and one column per session
+    (in ``sessions`` order), for the HTML report. Exports stream instead
+    (see ``stream_student_rows``); both take percentages from
+    ``attendance_percentage``, so they show the same numbers.
+    """
+
+    def __init__(self, sessions, enrollment_nos, names, status):
+        self.sessions = sessions
+        self.enrollment_nos = enrollment_nos
+        self.names = names
+        self.status = status
+
+    @classmethod
+    def pivot(cls, sessions, students, records):
+        """Build from session objects, ``(enrollment_no, name)`` student rows
+        and ``(session_id, enrollment_no, status)`` record rows."""
+        enrollment_nos = [s[0] for s in students]
+        names = [s[1] for s in students]
+        status = np.full((len(enrollment_nos), len(sessions)), MISSING, dtype=np.int8)
+
+        records = list(records)
+        if records and enrollment_nos and sessions:
+            rec_sessions = np.array([r[0] for r in records])
+            rec_enrolls = np.array([r[1] for r in records], dtype=str)
+            rec_present = np.array([r[2] == "Present" for r in records])
+
+            cols = _positions(np.array([s.id for s in sessions]), rec_sessions)
+            rows = _positions(np.array(enrollment_nos, dtype=str), rec_enrolls)
+            keep = (cols >= 0) & (rows >= 0)
+            status[rows[keep], cols[keep]] = np.where(rec_present[keep], PRESENT, ABSENT)
+
+        return cls(sessions, enrollment_nos, names, status)
+
+    @property
+    def present_counts(self):
+        return (self.status == PRESENT).sum(axis=1)
+
+    @property
+    def percentages(self):
+        return attendance_percentage(self.present_counts, len(self.sessions))
+
+    def table_rows(self):
+        """Rows in the shape ``Attendance_Report.html`` renders."""
+        for enroll, name, row, pct in zip(self.enrollment_nos, self.names, self.status, self.percentages):
+            yield {
+                "enrollment_no": enroll,
+                "student_name": name,
+                "attendance": [STATUS_LABELS[int(v)] for v in row],
+                "percentage": float(pct)
+            }
+
+
+def attendance_percentage(present, total):
+    """Present share of ``total`` sessions in percent, to one decimal;
+    ``present`` may be a count or an array of counts."""
+    present = np.asarray(present)
+    if not total:
+        return np.zeros(present.shape)
+    return np.round(present / total * 100, 1)
+
+
+def export_row(enroll, name, status_row, percentage, percent_format=lambda p: f"{p}%"):
+    return [enroll, name] + [STATUS_CODES[int(v)] for v in status_row] + [percent_format(float(percentage))]
+
+
+def stream_student_rows(sessions, rows, percent_format=lambda p: f"{p}%"):
+    """Export rows from a student-ordered ``(enrollment_no, name, session_id,
+    status)`` stream, such as a server-side cursor over Student LEFT JOIN
+    AttendanceRecord. This is the engine behind every export: only one
+    student's row is held at a time; the first record seen for a (student,
+    session) wins."""
+    columns = {s.id: i for i, s in enumerate(sessions)}
+    total = len(sessions)
+    current = name = status = None
+    for enroll, full_name, session_id, record_status in rows:
+        if enroll != current:
+            if current is not None:
+                yield _finish_row(current, name, status, total, percent_format)
+            current, name = enroll, full_name
+            status = np.full(total, MISSING, dtype=np.int8)
+        col = columns.get(session_id)
+        if col is not None and status[col] == MISSING:
+            status[col] = PRESENT if record_status == "Present" else ABSENT
+    if current is not None:
+        yield _finish_row(current, name, status, total, percent_format)
+
+
+def _finish_row(enroll, name, status, total, percent_format):
+    percentage = attendance_percentage(int((status == PRESENT).sum()), total)
+    return export_row(enroll, name, status, percentage, percent_format)
+
+
+def _positions(keys, values):
+    """Index of each of ``values`` in ``keys``, or -1 when absent."""
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    pos = np.clip(np.searchsorted(sorted_keys, values), 0, max(len(keys) - 1, 0))
+    found = sorted_keys[pos] == values
+    return np.where(found, order[pos], -1)